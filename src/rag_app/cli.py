@@ -1,15 +1,46 @@
-from streamlit.web import cli as stcli
-import sys
+import streamlit.config
+from streamlit.web import bootstrap
+import os
 from pathlib import Path
 
+def _parse_env_value(option, value: str):
+    """Convert a STREAMLIT_* env value to the option's type, as click would."""
+    if option.type is bool:
+        return value.strip().lower() in ("true", "1", "yes", "on")
+    if option.type is int:
+        return int(value)
+    if option.type is float:
+        return float(value)
+    if option.type is list:
+        return value.split()
+    return value
+
+def _env_flag_options() -> dict:
+    """
+    Collect config options set through STREAMLIT_* environment variables.
+
+    `streamlit run` gets these from click's auto_envvar_prefix; Streamlit's
+    config layer alone only reads env vars for sensitive options.
+    """
+    flag_options = {}
+    for option in streamlit.config.get_config_options().values():
+        value = os.environ.get(option.env_var)
+        if value is not None:
+            flag_options[option.key] = _parse_env_value(option, value)
+    return flag_options
+
 def main():
     app_path = Path(__file__).parent / "app.py"
 
-    # Mimic: streamlit run path/to/app.py
-    sys.argv = [
-        "streamlit",
-        "run",
-        str(app_path),
-    ]
+    # Equivalent of `streamlit run path/to/app.py`, without going through
+    # the click CLI (argument reparsing, logging and config reloads).
+    # `streamlit run` records the script path so that .streamlit/config.toml
+    # and secrets.toml next to the app are found; do the same here.
+    streamlit.config._main_script_path = str(app_path.resolve())
+
+    # Skip the usage-stats request at startup unless explicitly enabled
+    os.environ.setdefault("STREAMLIT_BROWSER_GATHER_USAGE_STATS", "false")
+    flag_options = _env_flag_options()
 
-    stcli.main()
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(str(app_path), False, [], flag_options)
@@ -2,7 +2,6 @@
 
 import os
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 
 # Load environment variables
 load_dotenv()
@@ -30,5 +29,7 @@ class Config:
     @classmethod
     def get_llm(cls):
         """Initialize and return the LLM model"""
+        from langchain.chat_models import init_chat_model
+
         os.environ["OPENAI_API_KEY"] = cls.OPENAI_API_KEY
         return init_chat_model(cls.LLM_MODEL)
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Recursive character splitter that avoids redundant length computations.
+"""
+
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Iterable, List, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+
+class CachedLenSplitter(RecursiveCharacterTextSplitter):
+    """
+    RecursiveCharacterTextSplitter with memoized length evaluations.
+
+    The recursive split measures every piece once to decide whether to
+    recurse and again while merging, and the merge re-measures pieces as
+    they are dropped from the overlap window. With a token-based
+    ``length_function`` these recounts dominate, so lengths are cached per
+    string and the merge keeps running sums instead of re-measuring.
+    """
+
+    def __init__(self, *args, length_cache_size: int = 8192, **kwargs):
+        """
+        Args:
+            length_cache_size: Number of distinct strings whose length is
+                kept in the LRU cache. Not used with the default ``len``,
+                which is O(1) and cheaper than a cache lookup.
+            *args, **kwargs: Forwarded to RecursiveCharacterTextSplitter.
+        """
+        super().__init__(*args, **kwargs)
+        if self._length_function is not len:
+            self._length_function = lru_cache(maxsize=length_cache_size)(
+                self._length_function
+            )
+
+    def _merge_splits(self, splits: Iterable[str], separator: str) -> List[str]:
+        """Merge splits into chunks, tracking lengths with running sums."""
+        separator_len = self._length_function(separator)
+
+        docs: List[str] = []
+        current: Deque[Tuple[str, int]] = deque()
+        total = 0
+
+        for split in splits:
+            split_len = self._length_function(split)
+            joined_len = split_len + (separator_len if current else 0)
+
+            if total + joined_len > self._chunk_size:
+                if total > self._chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than "
+                        "the specified %d",
+                        total,
+                        self._chunk_size,
+                    )
+                if current:
+                    doc = self._join_docs([piece for piece, _ in current], separator)
+                    if doc is not None:
+                        docs.append(doc)
+
+                    # Drop pieces from the front until the window fits the
+                    # overlap, reusing the lengths recorded on insertion.
+                    while total > self._chunk_overlap or (
+                        total + split_len + (separator_len if current else 0)
+                        > self._chunk_size
+                        and total > 0
+                    ):
+                        _, first_len = current.popleft()
+                        total -= first_len + (separator_len if current else 0)
+
+            current.append((split, split_len))
+            total += split_len + (separator_len if len(current) > 1 else 0)
+
+        doc = self._join_docs([piece for piece, _ in current], separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
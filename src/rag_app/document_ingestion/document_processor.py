@@ -2,33 +2,231 @@
 Document processing module for loading and splitting documents.
 """
 
+import asyncio
+import logging
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Union
-from langchain_community.document_loaders import (
-    WebBaseLoader,
-    PyPDFLoader,
-    TextLoader,
-    PyPDFDirectoryLoader
+from typing import (
+    Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 )
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langchain_core.documents import Document
 
+from rag_app.document_ingestion.cached_splitter import CachedLenSplitter
+
+try:
+    import uvloop
+except ImportError:  # optional; not available on Windows
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# Loaders are imported on demand: langchain_community.document_loaders pulls
+# in a large dependency tree that importing this module should not pay for.
+_LAZY_LOADERS = (
+    "WebBaseLoader",
+    "PyPDFLoader",
+    "TextLoader",
+    "PyPDFDirectoryLoader",
+)
+
+
+def __getattr__(name: str):
+    """Resolve document loader names lazily (PEP 562)."""
+    if name in _LAZY_LOADERS:
+        from langchain_community import document_loaders
+
+        return getattr(document_loaders, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=None)
+def _worker_splitter(chunk_size: int, chunk_overlap: int) -> CachedLenSplitter:
+    """Build one splitter per worker process and chunk configuration."""
+    return CachedLenSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _split_one(
+    args: Tuple[str, Dict[str, Any], int, int]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Split a single document's text in a worker process.
+
+    Takes and returns plain (text, metadata) tuples so that nothing but
+    builtins has to be pickled across the process boundary.
+    """
+    text, metadata, chunk_size, chunk_overlap = args
+    splitter = _worker_splitter(chunk_size, chunk_overlap)
+    return [(chunk, dict(metadata)) for chunk in splitter.split_text(text)]
+
+
+def _pypdf_load_one(path: str) -> List[Document]:
+    """Parse a single PDF in a worker process."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return PyPDFLoader(path).load()
+
+
+async def _gather_fetch(
+    urls: List[str],
+    headers: Optional[Dict[str, str]] = None,
+    concurrency: int = 32,
+    timeout: float = 15,
+) -> List[Document]:
+    """
+    Fetch webpages concurrently and extract their text.
+
+    Args:
+        urls: Pages to fetch.
+        headers: Optional HTTP headers sent with every request.
+        concurrency: Maximum number of requests in flight.
+        timeout: Total timeout per request, in seconds.
+
+    Returns:
+        One Document per successfully fetched URL, in the order of
+        ``urls``. URLs that fail (HTTP error, timeout, DNS, ...) are logged
+        and skipped so one bad page does not abort the whole ingest.
+    """
+    import aiohttp
+    from selectolax.lexbor import LexborHTMLParser
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(session: "aiohttp.ClientSession", url: str) -> Document:
+        async with semaphore:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                # Pages without a declared charset may not be valid UTF-8
+                html = await response.text(errors="replace")
+
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(["script", "style", "noscript"])
+        title = tree.css_first("title")
+        root = tree.body or tree.root
+        metadata = {"source": url}
+        if title is not None:
+            metadata["title"] = title.text(strip=True)
+        return Document(
+            page_content=root.text(separator="\n") if root else "",
+            metadata=metadata,
+        )
+
+    connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as session:
+        results = await asyncio.gather(
+            *(fetch(session, url) for url in urls), return_exceptions=True
+        )
+
+    docs: List[Document] = []
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            logger.warning("Failed to load %s: %r", url, result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            docs.append(result)
+    return docs
+
 
 class DocumentProcessor:
     """Handles document loading and splitting into manageable text chunks."""
 
-    def __init__(self, chunk_size: int = 200, chunk_overlap: int = 50):
+    # Model whose tokenizer (cl100k_base) sizes chunks in Rust splitter mode
+    TIKTOKEN_MODEL = "gpt-3.5-turbo"
+
+    # Below this many documents a process pool costs more than it saves
+    PARALLEL_SPLIT_MIN_DOCS = 32
+
+    # Number of loaded documents split together while streaming in process()
+    SPLIT_BATCH_SIZE = 64
+
+    # Below this many PDFs a directory is parsed in-process
+    PARALLEL_PDF_MIN_FILES = 8
+
+    def __init__(
+        self,
+        chunk_size: int = 200,
+        chunk_overlap: int = 50,
+        max_workers: int = 8,
+        length_function: Callable[[str], int] = len,
+        use_rust_splitter: bool = False,
+        pdf_workers: Optional[int] = None,
+    ):
         """
         Args:
             chunk_size: Maximum size of chunks after splitting.
             chunk_overlap: Number of overlapping characters between chunks.
+            max_workers: Number of threads used to load sources concurrently.
+            length_function: Function measuring chunk length (e.g. a token
+                counter). Its results are cached by the splitter.
+            use_rust_splitter: Split on tiktoken tokens with the Rust-backed
+                semantic-text-splitter. chunk_size and chunk_overlap are then
+                measured in tokens and length_function is ignored.
+            pdf_workers: Number of processes parsing PDFs in
+                load_from_pdf_dir. Defaults to the CPU count; lower it
+                (e.g. 4) when reading from spinning disks.
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.splitter = RecursiveCharacterTextSplitter(
+        self.max_workers = max_workers
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self._session = self._build_session()
+        self.length_function = length_function
+        self.splitter = CachedLenSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            length_function=length_function,
         )
+        self.rust_splitter = None
+        if use_rust_splitter:
+            from semantic_text_splitter import TextSplitter
+
+            self.rust_splitter = TextSplitter.from_tiktoken_model(
+                self.TIKTOKEN_MODEL,
+                capacity=chunk_size,
+                overlap=chunk_overlap,
+            )
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        """
+        Create the HTTP session shared by all URL loads.
+
+        Reusing one pooled session avoids a new TCP/TLS handshake per URL
+        when several pages come from the same host.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        # WebBaseLoader only applies its browser-like default headers to
+        # sessions it creates, so seed ours with them; USER_AGENT overrides
+        from langchain_community.document_loaders.web_base import (
+            default_header_template,
+        )
+
+        session.headers.update(default_header_template)
+        user_agent = os.getenv("USER_AGENT")
+        if user_agent:
+            session.headers["User-Agent"] = user_agent
+        return session
 
     # ----------------------------------------------------------------------
     # Loading functions
@@ -36,38 +234,97 @@ class DocumentProcessor:
 
     def load_from_url(self, url: str) -> List[Document]:
         """Load documents from a webpage URL."""
-        loader = WebBaseLoader(url)
+        from langchain_community.document_loaders import WebBaseLoader
+
+        loader = WebBaseLoader(url, session=self._session)
         return loader.load()
 
-    def load_from_pdf(self, file_path: Union[str, Path]) -> List[Document]:
-        """Load a single PDF file."""
+    def load_from_pdf(self, file_path: Union[str, Path]) -> Iterator[Document]:
+        """Lazily load a single PDF file, one page at a time."""
+        from langchain_community.document_loaders import PyPDFLoader
+
         loader = PyPDFLoader(str(file_path))
-        return loader.load()
+        yield from loader.lazy_load()
 
-    def load_from_pdf_dir(self, directory: Union[str, Path]) -> List[Document]:
-        """Load all PDF files inside a directory."""
-        loader = PyPDFDirectoryLoader(str(directory))
-        return loader.load()
+    def load_from_pdf_dir(
+        self,
+        directory: Union[str, Path],
+        parallel: bool = True,
+    ) -> Iterator[Document]:
+        """
+        Load all PDF files inside a directory (recursively).
+
+        Args:
+            directory: Directory to search for PDFs.
+            parallel: Parse files on a process pool of ``pdf_workers`` when
+                there are at least PARALLEL_PDF_MIN_FILES of them. Parsing
+                is CPU-bound, so threads would not help here.
+
+        Yields:
+            Pages of every PDF, in file order.
+        """
+        files = sorted(str(f) for f in Path(directory).rglob("[!.]*.pdf"))
+
+        if not parallel or len(files) < self.PARALLEL_PDF_MIN_FILES:
+            from langchain_community.document_loaders import PyPDFDirectoryLoader
+
+            loader = PyPDFDirectoryLoader(str(directory))
+            yield from loader.lazy_load()
+            return
+
+        with ProcessPoolExecutor(max_workers=self.pdf_workers) as executor:
+            for pages in executor.map(_pypdf_load_one, files, chunksize=4):
+                yield from pages
 
     def load_from_txt(self, file_path: Union[str, Path]) -> List[Document]:
         """Load the text contents of a TXT file as a single Document."""
+        from langchain_community.document_loaders import TextLoader
+
         loader = TextLoader(str(file_path), encoding="utf-8")
         return loader.load()
 
     def load_urls_from_txt(self, file_path: Union[str, Path]) -> List[Document]:
         """
         Load URLs stored line-by-line in a TXT file and fetch each webpage.
+
+        All URLs are fetched concurrently with aiohttp on one event loop.
         """
         urls = [
             line.strip() for line in Path(file_path).read_text().splitlines()
             if line.strip()
         ]
+        return self._load_urls(urls)
 
-        docs: List[Document] = []
-        for url in urls:
-            docs.extend(self.load_from_url(url))
+    def _load_urls(self, urls: List[str]) -> List[Document]:
+        """Fetch a list of URLs concurrently on one event loop."""
+        if not urls:
+            return []
 
-        return docs
+        # Only the User-Agent carries over: requests' other defaults (e.g.
+        # Connection, Accept-Encoding) are not meant for aiohttp
+        headers = {}
+        user_agent = self._session.headers.get("User-Agent")
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        return self._run_async(_gather_fetch(urls, headers=headers))
+
+    @staticmethod
+    def _run_async(coro):
+        """
+        Run a coroutine to completion from synchronous code.
+
+        Uses uvloop when it is installed. If an event loop is already
+        running in this thread (e.g. Streamlit), the coroutine is run on a
+        fresh loop in a worker thread instead.
+        """
+        run = uvloop.run if uvloop is not None else asyncio.run
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run(coro)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(run, coro).result()
 
     # ----------------------------------------------------------------------
     # General multipurpose loader
@@ -77,57 +334,126 @@ class DocumentProcessor:
         """
         Load documents from URLs, PDF files/directories, or .txt files.
 
+        Sources are loaded concurrently on a thread pool (loading is IO-bound);
+        the returned documents keep the order of the given sources.
+
         Args:
             sources: List of paths/URLs.
 
         Returns:
             Loaded documents.
         """
-        docs: List[Document] = []
+        return list(self._load_sources_iter(sources))
 
+    def _load_sources_iter(self, sources: List[str]) -> Iterator[Document]:
+        """
+        Yield loaded documents in source order.
+
+        URLs and TXT files load on a thread pool (IO-bound). When there are
+        at least PARALLEL_PDF_MIN_FILES PDFs, they are parsed on a process
+        pool of ``pdf_workers`` instead, since pypdf parsing holds the GIL.
+        Only a bounded window of sources is in flight at once, so only a
+        bounded number of loaded sources is held in memory. Granularity is
+        per source: each source (e.g. a whole PDF) is fully loaded by its
+        worker before any of its pages are yielded.
+        """
+        tasks: List[Tuple[str, Union[str, Path]]] = []
         for src in sources:
-            path = Path(src)
+            tasks.extend(self._classify_source(src))
 
-            if src.startswith(("http://", "https://")):
-                docs.extend(self.load_from_url(src))
+        if not tasks:
+            return
 
-            elif path.is_dir():
-                for file in path.iterdir():
-                    if not file.is_file():
-                        continue
+        num_pdfs = sum(1 for kind, _ in tasks if kind == "pdf")
+        use_pdf_pool = num_pdfs >= self.PARALLEL_PDF_MIN_FILES
 
-                suffix = file.suffix.lower()
+        with ExitStack() as stack:
+            executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.max_workers)
+            )
+            pdf_pool = None
+            window = self.max_workers
+            if use_pdf_pool:
+                pdf_pool = stack.enter_context(
+                    ProcessPoolExecutor(max_workers=self.pdf_workers)
+                )
+                window = max(window, self.pdf_workers)
 
-                if suffix == ".pdf":
-                    docs.extend(self.load_from_pdf(file))
+            pending = deque()
+            for kind, arg in tasks:
+                if kind == "pdf" and pdf_pool is not None:
+                    pending.append(pdf_pool.submit(_pypdf_load_one, str(arg)))
+                else:
+                    pending.append(executor.submit(self._load_one, kind, arg))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+    def _classify_source(self, src: str) -> List[Tuple[str, Union[str, Path]]]:
+        """Resolve a source into ``(kind, arg)`` load tasks."""
+        path = Path(src)
+
+        if src.startswith(("http://", "https://")):
+            return [("url", src)]
+
+        if path.is_dir():
+            # One task per file so a single large directory also parallelizes
+            tasks: List[Tuple[str, Union[str, Path]]] = []
+            for file in sorted(path.iterdir()):
+                if not file.is_file():
+                    continue
 
+                suffix = file.suffix.lower()
+                if suffix == ".pdf":
+                    tasks.append(("pdf", file))
                 elif suffix == ".txt":
-                    if self._txt_contains_urls(file):
-                        docs.extend(self.load_urls_from_txt(file))
-                    else:
-                        docs.extend(self.load_from_txt(file))
-                
-            elif path.suffix.lower() == ".pdf":
-                docs.extend(self.load_from_pdf(path))
-
-            elif path.suffix.lower() == ".txt":
-                # If the txt file contains URLs, load them:
-                if self._txt_contains_urls(path):
-                    docs.extend(self.load_urls_from_txt(path))
-                else:
-                    docs.extend(self.load_from_txt(path))
+                    tasks.append(("txt", file))
+            return tasks
+
+        if path.suffix.lower() == ".pdf":
+            return [("pdf", path)]
+
+        if path.suffix.lower() == ".txt":
+            return [("txt", path)]
+
+        raise ValueError(f"Unsupported source type: {src}")
 
-            else:
-                raise ValueError(f"Unsupported source type: {src}")
+    def _load_one(self, kind: str, arg: Union[str, Path]) -> List[Document]:
+        """Load a single classified source."""
+        if kind == "url":
+            return self.load_from_url(arg)
 
-        return docs
+        if kind == "pdf":
+            # Materialized: results cross the worker/future boundary whole
+            return list(self.load_from_pdf(arg))
 
-    def _txt_contains_urls(self, file_path: Path) -> bool:
-        """Check whether a TXT file contains URLs."""
-        for line in file_path.read_text().splitlines():
-            if line.strip().startswith(("http://", "https://")):
-                return True
-        return False
+        # The file is read once; its lines route it to the right loader
+        is_url_list, lines = self._classify_txt(arg)
+        if is_url_list:
+            return self._load_urls(lines)
+        return [Document(page_content="".join(lines), metadata={"source": str(arg)})]
+
+    def _classify_txt(self, file_path: Path) -> Tuple[bool, List[str]]:
+        """
+        Read a TXT file once and decide whether it is a list of URLs.
+
+        URL lists and prose files are not mixed in practice, so the first
+        non-empty line decides the routing.
+
+        Returns:
+            ``(True, urls)`` with the stripped non-empty lines if the file
+            starts with a URL, otherwise ``(False, lines)`` with the raw
+            lines, which join back into the file's text.
+        """
+        with open(file_path, encoding="utf-8") as f:
+            lines = f.readlines()
+
+        first = next((line.strip() for line in lines if line.strip()), "")
+        if first.startswith(("http://", "https://")):
+            return True, [line.strip() for line in lines if line.strip()]
+        return False, lines
 
     # ----------------------------------------------------------------------
     # Splitting
@@ -135,7 +461,93 @@ class DocumentProcessor:
 
     def split_documents(self, documents: List[Document]) -> List[Document]:
         """Split loaded documents into chunks."""
-        return self.splitter.split_documents(documents)
+        if self._can_split_in_parallel(documents):
+            return self._split_documents_parallel(documents)
+
+        if self.rust_splitter is None:
+            return self.splitter.split_documents(documents)
+
+        # The Rust splitter only returns strings, so carry metadata over
+        chunks: List[Document] = []
+        for doc in documents:
+            for text in self.rust_splitter.chunks(doc.page_content):
+                chunks.append(
+                    Document(page_content=text, metadata=dict(doc.metadata))
+                )
+        return chunks
+
+    def _can_split_in_parallel(self, documents: List[Document]) -> bool:
+        """Whether splitting is worth (and safe) to spread over processes."""
+        # Custom length functions may not be picklable, so only the default
+        # character splitter is rebuilt inside worker processes.
+        return (
+            self.rust_splitter is None
+            and self.length_function is len
+            and len(documents) >= self.PARALLEL_SPLIT_MIN_DOCS
+            and (os.cpu_count() or 1) > 1
+        )
+
+    @staticmethod
+    def _split_workers() -> int:
+        """Number of processes used for parallel splitting."""
+        return max(1, (os.cpu_count() or 1) - 1)
+
+    def _split_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool used for parallel splitting."""
+        return ProcessPoolExecutor(max_workers=self._split_workers())
+
+    def _split_documents_parallel(
+        self,
+        documents: List[Document],
+        executor: Optional[Executor] = None,
+    ) -> List[Document]:
+        """Split documents across a process pool, preserving order."""
+        if executor is None:
+            with self._split_pool() as pool:
+                return self._split_documents_parallel(documents, pool)
+
+        args = [
+            (doc.page_content, doc.metadata, self.chunk_size, self.chunk_overlap)
+            for doc in documents
+        ]
+
+        # Spread each call over every worker, capped to keep IPC batches small
+        chunksize = max(1, min(16, len(args) // self._split_workers()))
+
+        chunks: List[Document] = []
+        for pieces in executor.map(_split_one, args, chunksize=chunksize):
+            chunks.extend(
+                Document(page_content=text, metadata=metadata)
+                for text, metadata in pieces
+            )
+        return chunks
+
+    def iter_process(self, sources: List[str]) -> Iterator[Document]:
+        """
+        Streaming pipeline: load -> split, yielding chunks as they are made.
+
+        Loaded documents are split in batches of SPLIT_BATCH_SIZE, so pages
+        are released once chunked instead of all being held until the end.
+        Peak memory is bounded by the in-flight window of whole sources (see
+        _load_sources_iter), not by single pages: one large PDF is still
+        held in full while it is loaded.
+        """
+        docs_iter = self._load_sources_iter(sources)
+
+        with ExitStack() as stack:
+            pool: Optional[Executor] = None
+            while True:
+                batch = list(islice(docs_iter, self.SPLIT_BATCH_SIZE))
+                if not batch:
+                    return
+
+                if self._can_split_in_parallel(batch):
+                    # Start the pool once and reuse it for every batch
+                    if pool is None:
+                        pool = stack.enter_context(self._split_pool())
+                    yield from self._split_documents_parallel(batch, pool)
+                else:
+                    yield from self.split_documents(batch)
 
     def process(self, sources: List[str]) -> List[Document]:
         """
@@ -147,5 +559,4 @@ class DocumentProcessor:
         Returns:
             Chunked documents.
         """
-        docs = self.load_sources(sources)
-        return self.split_documents(docs)
+        return list(self.iter_process(sources))
@@ -1,55 +1,146 @@
 """LangGraph nodes for RAG workflow with ReAct agent inside generate_answer."""
 
-from typing import List
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 from rag_app.state.rag_state import RAGState
 
+from langchain_core.documents import Document
 from langchain_core.tools import Tool
 from langchain_core.messages import HumanMessage
-from langchain.agents import create_agent
 
-# Wikipedia tool
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
+
+@lru_cache(maxsize=1)
+def _wiki():
+    """Shared Wikipedia query tool (its API wrapper is reusable)."""
+    from langchain_community.tools import WikipediaQueryRun
+    from langchain_community.utilities import WikipediaAPIWrapper
+
+    return WikipediaQueryRun(
+        api_wrapper=WikipediaAPIWrapper(top_k_results=3, lang="en")
+    )
+
+
+# Compiled agent shared by RAGNodes instances, keyed by (id(llm), id(retriever)).
+# The entry keeps the llm and retriever alive so their ids cannot be reused;
+# only the most recent agent is kept, so a rebuilt index does not pin the old
+# vectorstore for the life of the process.
+_AGENT_CACHE_SIZE = 1
+_AGENT_CACHE: Dict[Tuple[int, int], Tuple[Any, Any, Any]] = {}
 
 
 class RAGNodes:
     """Node definitions for a 2-step RAG workflow with a ReAct agent."""
 
+    # Semantic retrieval cache: ring buffer of unit query vectors
+    SEMANTIC_CACHE_SIZE = 4096
+    SEMANTIC_CACHE_THRESHOLD = 0.97
+
+    # Exact-match answer cache (LRU + TTL)
+    ANSWER_CACHE_SIZE = 1024
+    ANSWER_CACHE_TTL = 3600  # seconds
+
     def __init__(self, retriever, llm):
         self.retriever = retriever
         self.llm = llm
         self._agent = None  # lazy init
 
+        self._cache_vecs: Optional[np.ndarray] = None  # allocated on first use
+        self._cache_docs: List[Optional[List[Document]]] = (
+            [None] * self.SEMANTIC_CACHE_SIZE
+        )
+        self._cache_count = 0
+        self._cache_next = 0
+
+        self._answer_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
     # ------------------------------------------------------------------
     # 1. RETRIEVE DOCUMENTS
     # ------------------------------------------------------------------
     def retrieve_docs(self, state: RAGState) -> RAGState:
-        """Retrieve docs using the vectorstore retriever."""
-        docs = self.retriever.invoke(state.question)
+        """
+        Retrieve docs using the vectorstore retriever.
+
+        Results are cached by query embedding: a question whose embedding
+        has cosine similarity >= SEMANTIC_CACHE_THRESHOLD with a previous
+        one reuses that question's documents without searching again.
+        """
+        embedder = self._query_embedder()
+        if embedder is None:
+            docs = self.retriever.invoke(state.question)
+        else:
+            vec = np.asarray(embedder.embed_query(state.question), dtype=np.float32)
+            unit = vec / (np.linalg.norm(vec) + 1e-12)
+
+            docs = self._cache_lookup(unit)
+            if docs is None:
+                docs = self._search_by_vector(state.question, vec)
+                self._cache_store(unit, docs)
+
         return RAGState(
             question=state.question,
             retrieved_docs=docs
         )
 
+    def _query_embedder(self):
+        """Return the retriever's query embedder, if it exposes one."""
+        vectorstore = getattr(self.retriever, "vectorstore", None)
+        embedder = getattr(vectorstore, "embedding_function", None)
+        return embedder if hasattr(embedder, "embed_query") else None
+
+    def _search_by_vector(self, question: str, vec: np.ndarray) -> List[Document]:
+        """Search with an already computed embedding to avoid re-embedding."""
+        if getattr(self.retriever, "search_type", None) != "similarity":
+            return self.retriever.invoke(question)
+
+        return self.retriever.vectorstore.similarity_search_by_vector(
+            vec.tolist(), **self.retriever.search_kwargs
+        )
+
+    def _cache_lookup(self, unit: np.ndarray) -> Optional[List[Document]]:
+        """Return cached docs for the most similar cached query, if close enough."""
+        if not self._cache_count:
+            return None
+
+        sims = self._cache_vecs[: self._cache_count] @ unit
+        best = int(np.argmax(sims))
+        if sims[best] >= self.SEMANTIC_CACHE_THRESHOLD:
+            return self._cache_docs[best]
+        return None
+
+    def _cache_store(self, unit: np.ndarray, docs: List[Document]) -> None:
+        """Insert a query vector and its docs, overwriting the oldest slot."""
+        if self._cache_vecs is None:
+            self._cache_vecs = np.zeros(
+                (self.SEMANTIC_CACHE_SIZE, unit.shape[0]), dtype=np.float32
+            )
+
+        slot = self._cache_next
+        self._cache_vecs[slot] = unit
+        self._cache_docs[slot] = docs
+        self._cache_next = (slot + 1) % self.SEMANTIC_CACHE_SIZE
+        self._cache_count = min(self._cache_count + 1, self.SEMANTIC_CACHE_SIZE)
+
     # ------------------------------------------------------------------
     # 2. BUILD TOOLS (retriever + Wikipedia)
     # ------------------------------------------------------------------
     def _build_tools(self) -> List[Tool]:
         """Create tool wrappers for retriever + Wikipedia."""
+        # Capture only the retriever: the agent (and these tools) is shared
+        # via _AGENT_CACHE and must not keep this RAGNodes instance alive.
+        retriever = self.retriever
 
         # Vectorstore retriever tool (wrapped to avoid type hint issues)
         def retriever_tool_fn(query: str) -> str:
-            docs = self.retriever.invoke(query)
+            docs = retriever.invoke(query)
             if not docs:
                 return "No documents found."
-
-            merged = []
-            for i, d in enumerate(docs[:8], start=1):
-                meta = d.metadata or {}
-                title = meta.get("title") or meta.get("source") or f"doc_{i}"
-                merged.append(f"[{i}] {title}\n{d.page_content}")
-
-            return "\n\n".join(merged)
+            return RAGNodes._format_docs(docs)
 
         retriever_tool = Tool(
             name="retriever",
@@ -58,12 +149,8 @@ class RAGNodes:
         )
 
         # Wikipedia tool (wrapped to prevent annotation-inspection issues)
-        wiki = WikipediaQueryRun(
-            api_wrapper=WikipediaAPIWrapper(top_k_results=3, lang="en")
-        )
-
         def wikipedia_tool_fn(query: str) -> str:
-            return wiki.run(query)
+            return _wiki().run(query)
 
         wikipedia_tool = Tool(
             name="wikipedia",
@@ -73,15 +160,42 @@ class RAGNodes:
 
         return [retriever_tool, wikipedia_tool]
 
+    @staticmethod
+    def _format_docs(docs: List[Document]) -> str:
+        """Render up to 8 docs as numbered, titled context blocks."""
+        merged = []
+        for i, d in enumerate(docs[:8], start=1):
+            meta = d.metadata or {}
+            title = meta.get("title") or meta.get("source") or f"doc_{i}"
+            merged.append(f"[{i}] {title}\n{d.page_content}")
+
+        return "\n\n".join(merged)
+
     # ------------------------------------------------------------------
     # 3. BUILD REACT AGENT
     # ------------------------------------------------------------------
     def _build_agent(self):
-        """Construct the ReAct agent using LangChain's helper."""
+        """
+        Construct the ReAct agent using LangChain's helper.
+
+        Agents are shared across instances using the same llm and retriever,
+        so rebuilding the nodes (e.g. on a Streamlit rerun) reuses them.
+        """
+        key = (id(self.llm), id(self.retriever))
+        cached = _AGENT_CACHE.get(key)
+        if cached is not None and cached[0] is self.llm and cached[1] is self.retriever:
+            self._agent = cached[2]
+            return
+
+        from langchain.agents import create_agent
+
         tools = self._build_tools()
         system_prompt = (
             "You are a helpful RAG agent.\n"
-            "- Prefer the 'retriever' tool for document-based questions.\n"
+            "- The question comes with context already retrieved from the "
+            "user's corpus; answer from it when it is sufficient.\n"
+            "- Use the 'retriever' tool only for follow-up searches of the "
+            "corpus.\n"
             "- Use 'wikipedia' for external general knowledge.\n"
             "- Return only the final answer."
         )
@@ -90,25 +204,74 @@ class RAGNodes:
             tools=tools,
             system_prompt=system_prompt
         )
+        while len(_AGENT_CACHE) >= _AGENT_CACHE_SIZE:
+            _AGENT_CACHE.pop(next(iter(_AGENT_CACHE)))
+        _AGENT_CACHE[key] = (self.llm, self.retriever, self._agent)
 
     # ------------------------------------------------------------------
     # 4. AGENT NODE
     # ------------------------------------------------------------------
     def generate_answer(self, state: RAGState) -> RAGState:
-        """Generate answer using the ReAct agent."""
+        """
+        Generate answer using the ReAct agent.
+
+        Answers are cached by normalized question text, so verbatim repeats
+        within ANSWER_CACHE_TTL skip the agent entirely.
+        """
+        key = self._answer_key(state.question)
+        cached = self._answer_cache.get(key)
+        if cached is not None and time.time() - cached[0] < self.ANSWER_CACHE_TTL:
+            self._answer_cache.move_to_end(key)
+            self.cache_stats["hits"] += 1
+            return RAGState(
+                question=state.question,
+                retrieved_docs=state.retrieved_docs,
+                answer=cached[1]
+            )
+        self.cache_stats["misses"] += 1
+
         if self._agent is None:
             self._build_agent()
 
+        # Hand the docs retrieved by retrieve_docs to the agent up front so
+        # its first step does not repeat the same search via the tool.
+        content = state.question
+        if state.retrieved_docs:
+            context = self._format_docs(state.retrieved_docs)
+            content = f"Context:\n{context}\n\nQuestion: {state.question}"
+
         result = self._agent.invoke({
-            "messages": [HumanMessage(content=state.question)]
+            "messages": [HumanMessage(content=content)]
         })
 
         # Extract last message content
         messages = result.get("messages", [])
         answer = messages[-1].content if messages else None
 
+        if answer:
+            self._answer_cache[key] = (time.time(), answer)
+            self._answer_cache.move_to_end(key)
+            while len(self._answer_cache) > self.ANSWER_CACHE_SIZE:
+                self._answer_cache.popitem(last=False)
+
         return RAGState(
             question=state.question,
             retrieved_docs=state.retrieved_docs,
             answer=answer or "Could not generate answer."
         )
+
+    # ------------------------------------------------------------------
+    # 5. CACHE MANAGEMENT
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _answer_key(question: str) -> str:
+        """Cache key for a question: SHA-256 of its normalized text."""
+        return hashlib.sha256(question.strip().lower().encode()).hexdigest()
+
+    def clear_cache(self) -> None:
+        """Drop all cached retrievals and answers and reset the stats."""
+        self._cache_docs = [None] * self.SEMANTIC_CACHE_SIZE
+        self._cache_count = 0
+        self._cache_next = 0
+        self._answer_cache.clear()
+        self.cache_stats = {"hits": 0, "misses": 0}
@@ -2,39 +2,133 @@
 Vectorstore creation module for document embedding and retrieval.
 """
 
-from typing import List, Optional
+import asyncio
+import hashlib
+import math
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+from langchain_classic.embeddings import CacheBackedEmbeddings
+from langchain_classic.storage import LocalFileStore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 
 
+class NormEmbeddings(OpenAIEmbeddings):
+    """
+    OpenAIEmbeddings returning unit-length vectors.
+
+    With normalized vectors, cosine similarity is a plain inner product, so
+    FAISS can search with a single dot product per vector.
+    """
+
+    @staticmethod
+    def _normalize(vectors: List[List[float]]) -> List[List[float]]:
+        """Scale each vector to unit L2 norm."""
+        X = np.asarray(vectors, dtype=np.float32)
+        X /= np.linalg.norm(X, axis=1, keepdims=True) + 1e-12
+        return X.tolist()
+
+    # embed_query / aembed_query delegate to these, so queries are covered too
+    def embed_documents(self, texts: List[str], *args, **kwargs) -> List[List[float]]:
+        return self._normalize(super().embed_documents(texts, *args, **kwargs))
+
+    async def aembed_documents(
+        self, texts: List[str], *args, **kwargs
+    ) -> List[List[float]]:
+        return self._normalize(await super().aembed_documents(texts, *args, **kwargs))
+
+
 class VectorStoreManager:
     """
     Manages vector store creation, retrieval, and persistence.
     """
 
-    def __init__(self, embedding_model=None):
+    DEFAULT_CACHE_DIR = Path.home() / ".cache" / "rag_project" / "embeddings"
+    EMBED_BATCH_SIZE = 2048
+
+    # From this many vectors on, the flat index is replaced by IVF-PQ
+    IVFPQ_MIN_DOCS = 10_000
+    IVFPQ_SUBQUANTIZERS = 64
+    IVFPQ_BITS = 8
+    IVF_NPROBE = 16
+
+    def __init__(
+        self,
+        embedding_model=None,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
         """
         Initialize the vectorstore manager.
 
         Args:
-            embedding_model: Optional custom embedding model.
+            embedding_model: Optional custom embedding model. Defaults to
+                NormEmbeddings sending up to EMBED_BATCH_SIZE texts per
+                request, which cuts round-trips for small chunks. Custom
+                models are searched by L2 distance, normalized ones by
+                inner product.
+            cache_dir: Directory for the persistent embedding cache.
+                Defaults to ~/.cache/rag_project/embeddings.
         """
-        self.embedding = embedding_model or OpenAIEmbeddings()
+        self.base_embedding = embedding_model or NormEmbeddings(
+            chunk_size=self.EMBED_BATCH_SIZE,
+            max_retries=6,
+            request_timeout=60,
+        )
+        self.distance_strategy = (
+            DistanceStrategy.MAX_INNER_PRODUCT
+            if isinstance(self.base_embedding, NormEmbeddings)
+            else DistanceStrategy.EUCLIDEAN_DISTANCE
+        )
+        self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_CACHE_DIR
+
+        # Embeddings are a pure function of (model, text): cache them on disk
+        # so rebuilding over an overlapping corpus only embeds new chunks.
+        namespace = getattr(
+            self.base_embedding, "model", type(self.base_embedding).__name__
+        )
+        if isinstance(self.base_embedding, NormEmbeddings):
+            # LocalFileStore keys may only contain [a-zA-Z0-9_.\-/]
+            namespace += "-normalized"
+        self.embedding = CacheBackedEmbeddings.from_bytes_store(
+            self.base_embedding,
+            LocalFileStore(str(self.cache_dir)),
+            namespace=namespace,
+            key_encoder="sha256",
+        )
         self.vectorstore: Optional[FAISS] = None
         self.retriever: Optional[BaseRetriever] = None
+        # Serializes searches that temporarily override the index's nprobe
+        self._search_lock = threading.Lock()
 
     # ----------------------------------------------------------------------
     # Creation
     # ----------------------------------------------------------------------
 
-    def create_vectorstore(self, documents: List[Document]):
+    def create_vectorstore(
+        self,
+        documents: List[Document],
+        embed_batch_size: Optional[int] = None,
+        vector_dtype: str = "fp32",
+    ):
         """
         Create a FAISS vectorstore from given documents.
 
         Args:
             documents: List of documents to embed.
+            embed_batch_size: Optional number of texts sent per embedding
+                request for this build. Only applies to embedding models
+                exposing a ``chunk_size`` attribute (e.g. OpenAIEmbeddings).
+            vector_dtype: Storage precision of a flat index, "fp32" or
+                "fp16". fp16 halves index memory and search bandwidth with
+                negligible recall loss. IVF-PQ indexes are already compressed
+                and ignore it.
 
         Returns:
             self (to enable method chaining)
@@ -45,10 +139,121 @@ class VectorStoreManager:
         if not documents:
             raise ValueError("No valid documents provided to create vectorstore.")
 
-        self.vectorstore = FAISS.from_documents(documents, self.embedding)
+        documents = self._deduplicate(documents)
+
+        if vector_dtype not in ("fp32", "fp16"):
+            raise ValueError(f"Unsupported vector_dtype: {vector_dtype}")
+
+        previous_batch_size = getattr(self.base_embedding, "chunk_size", None)
+        if embed_batch_size is not None and previous_batch_size is not None:
+            self.base_embedding.chunk_size = embed_batch_size
+
+        try:
+            self.vectorstore = FAISS.from_documents(
+                documents,
+                self.embedding,
+                distance_strategy=self.distance_strategy,
+            )
+        finally:
+            if embed_batch_size is not None and previous_batch_size is not None:
+                self.base_embedding.chunk_size = previous_batch_size
+
+        if len(documents) >= self.IVFPQ_MIN_DOCS:
+            self._use_ivfpq_index()
+        elif vector_dtype == "fp16":
+            self._use_fp16_index()
+
         self.retriever = self.vectorstore.as_retriever()
         return self
 
+    @staticmethod
+    def _deduplicate(documents: List[Document]) -> List[Document]:
+        """
+        Drop chunks whose text is identical to an earlier one.
+
+        Boilerplate (footers, navigation, disclaimers) repeats verbatim across
+        pages; embedding it once is enough. The sources of dropped duplicates
+        are recorded in the kept document's ``sources`` metadata, on a copy
+        so the input Documents are not modified.
+        """
+        seen = {}
+        copied = set()
+        unique: List[Document] = []
+        for doc in documents:
+            digest = hashlib.blake2b(
+                doc.page_content.strip().encode(), digest_size=16
+            ).digest()
+            if digest not in seen:
+                seen[digest] = len(unique)
+                unique.append(doc)
+            else:
+                idx = seen[digest]
+                kept = unique[idx]
+                if idx not in copied:
+                    # Copy before annotating so the caller's Document is untouched
+                    sources = list(
+                        kept.metadata.get("sources", [kept.metadata.get("source")])
+                    )
+                    kept = kept.model_copy(
+                        update={"metadata": {**kept.metadata, "sources": sources}}
+                    )
+                    unique[idx] = kept
+                    copied.add(idx)
+                kept.metadata["sources"].append(doc.metadata.get("source"))
+        return unique
+
+    def _use_ivfpq_index(self):
+        """
+        Replace the flat index with an IVF-PQ index over the same vectors.
+
+        Flat search scans every float32 vector; IVF-PQ probes a few inverted
+        lists of 8-bit product-quantized codes, trading a little recall
+        (tunable through nprobe) for far less memory and faster queries.
+        """
+        import faiss
+
+        vectors, metric = self._flat_vectors()
+        n, d = vectors.shape
+        if metric == faiss.METRIC_INNER_PRODUCT:
+            quantizer = faiss.IndexFlatIP(d)
+        else:
+            quantizer = faiss.IndexFlatL2(d)
+
+        # The number of subquantizers must divide the dimension
+        m = max(x for x in range(1, self.IVFPQ_SUBQUANTIZERS + 1) if d % x == 0)
+        nlist = int(4 * math.sqrt(n))
+
+        index = faiss.IndexIVFPQ(quantizer, d, nlist, m, self.IVFPQ_BITS, metric)
+        index.train(vectors)
+        index.add(vectors)
+        # IVF indexes need a direct map for reconstruct(), used by MMR search
+        index.make_direct_map()
+        index.nprobe = self.IVF_NPROBE
+        self.vectorstore.index = index
+
+    def _use_fp16_index(self):
+        """Replace the flat float32 index with a float16 scalar-quantized one."""
+        import faiss
+
+        vectors, metric = self._flat_vectors()
+        index = faiss.IndexScalarQuantizer(
+            vectors.shape[1], faiss.ScalarQuantizer.QT_fp16, metric
+        )
+        index.train(vectors)
+        index.add(vectors)
+        self.vectorstore.index = index
+
+    def _flat_vectors(self):
+        """Return the stored vectors and the FAISS metric of the store."""
+        import faiss
+
+        flat = self.vectorstore.index
+        vectors = flat.reconstruct_n(0, flat.ntotal)
+
+        if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+            return vectors, faiss.METRIC_INNER_PRODUCT
+        return vectors, faiss.METRIC_L2
+
     # ----------------------------------------------------------------------
     # Retrieval
     # ----------------------------------------------------------------------
@@ -59,21 +264,82 @@ class VectorStoreManager:
             raise ValueError("Vectorstore not initialized. Call create_vectorstore().")
         return self.retriever
 
-    def retrieve(self, query: str, k: int = 4) -> List[Document]:
+    def retrieve(
+        self,
+        query: str,
+        k: int = 4,
+        nprobe: Optional[int] = None,
+    ) -> List[Document]:
         """
         Retrieve relevant documents for a query.
 
         Args:
             query: Query text.
             k: Number of documents to retrieve.
+            nprobe: Number of inverted lists probed when the store uses an
+                IVF index (see IVF_NPROBE). Ignored for flat indexes.
 
         Returns:
             List of top-k matching documents.
         """
+        with self._search_params(nprobe):
+            return self.retriever.invoke(query, k=k)
+
+    async def aretrieve(
+        self,
+        query: str,
+        k: int = 4,
+        nprobe: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        Asynchronously retrieve relevant documents for a query.
+
+        Lets async callers run several retrievals concurrently, e.g. with
+        ``asyncio.gather``. Arguments are the same as for retrieve(); calls
+        overriding nprobe on an IVF index run the synchronous search in a
+        worker thread, serialized with other overrides.
+
+        Returns:
+            List of top-k matching documents.
+        """
+        if self._overrides_nprobe(nprobe):
+            return await asyncio.to_thread(self.retrieve, query, k, nprobe)
+
+        with self._search_params(None):
+            return await self.retriever.ainvoke(query, k=k)
+
+    def _overrides_nprobe(self, nprobe: Optional[int]) -> bool:
+        """Whether a search must temporarily change the index's nprobe."""
+        return (
+            nprobe is not None
+            and self.vectorstore is not None
+            and hasattr(self.vectorstore.index, "nprobe")
+        )
+
+    @contextmanager
+    def _search_params(self, nprobe: Optional[int]):
+        """
+        Check the store is ready and apply the IVF probe count for one search.
+
+        The override, search and restore happen under a lock, so concurrent
+        overrides cannot restore out of order and leave a stale nprobe on the
+        index. The search inside must therefore be synchronous.
+        """
         if self.retriever is None:
             raise ValueError("Vectorstore not initialized. Call create_vectorstore().")
 
-        return self.retriever.get_relevant_documents(query)
+        if not self._overrides_nprobe(nprobe):
+            yield
+            return
+
+        index = self.vectorstore.index
+        with self._search_lock:
+            previous = index.nprobe
+            index.nprobe = nprobe
+            try:
+                yield
+            finally:
+                index.nprobe = previous
 
     # ----------------------------------------------------------------------
     # Persistence
@@ -87,5 +353,7 @@ class VectorStoreManager:
 
     def load(self, folder: str):
         """Load vectorstore from local directory."""
-        self.vectorstore = FAISS.load_local(folder, self.embedding)
+        self.vectorstore = FAISS.load_local(
+            folder, self.embedding, distance_strategy=self.distance_strategy
+        )
         self.retriever = self.vectorstore.as_retriever()
@@ -0,0 +1,45 @@
+"""Tests for the vectorstore manager."""
+
+import hashlib
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_classic")
+pytest.importorskip("langchain_openai")
+
+from langchain_core.documents import Document
+from langchain_openai import OpenAIEmbeddings
+
+from rag_app.vectorstore.create_vectorstore import NormEmbeddings, VectorStoreManager
+
+
+def _fake_embed_documents(self, texts, *args, **kwargs):
+    """Deterministic, unnormalized 8-d vectors derived from the text."""
+    vectors = []
+    for text in texts:
+        digest = hashlib.sha256(text.encode()).digest()
+        vectors.append([float(b) + 1.0 for b in digest[:8]])
+    return vectors
+
+
+@pytest.fixture
+def stub_openai(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(OpenAIEmbeddings, "embed_documents", _fake_embed_documents)
+
+
+def test_default_embedder_builds_store(stub_openai, tmp_path):
+    manager = VectorStoreManager(cache_dir=tmp_path)
+    assert isinstance(manager.base_embedding, NormEmbeddings)
+
+    docs = [
+        Document(page_content="attention is all you need", metadata={"source": "a"}),
+        Document(page_content="transformers use self-attention", metadata={"source": "b"}),
+    ]
+    manager.create_vectorstore(docs)
+    assert manager.vectorstore.index.ntotal == 2
+
+    # Rebuilding hits the on-disk cache with the same (valid) keys
+    manager.create_vectorstore(docs)
+    assert any(tmp_path.iterdir())